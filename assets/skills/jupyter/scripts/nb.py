@@ -5,6 +5,8 @@
 #     "nbformat>=5.9",
 #     "nbclient>=0.8",
 #     "nbconvert>=7.0",
+#     "orjson>=3.9",
+#     "ijson>=3.2",
 # ]
 # ///
 """
@@ -24,14 +26,27 @@ from __future__ import annotations
 
 import argparse
 import ast
+import importlib
+import io
 import json
+import os
 import re
 import sys
-from dataclasses import dataclass
+import warnings
+from binascii import a2b_base64
+from bisect import bisect_right
+from contextlib import contextmanager, redirect_stdout
+from dataclasses import dataclass, field
+from itertools import accumulate
 from pathlib import Path
-from typing import TYPE_CHECKING, Protocol
+from typing import TYPE_CHECKING, Any, Protocol
+
+import orjson
 
 if TYPE_CHECKING:
+    from collections.abc import Iterator
+    from types import ModuleType
+
     from nbformat import NotebookNode
 
 
@@ -83,6 +98,24 @@ class CellMatch:
     source: str
 
 
+@dataclass
+class ImageSink:
+    """Decoded image outputs queued for a single batched write."""
+
+    directory: Path
+    pending: list[tuple[Path, bytes]] = field(default_factory=list)
+
+    def flush(self) -> None:
+        """Write queued images, creating the directory once."""
+        if not self.pending:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        for path, payload in self.pending:
+            with open(path, "wb") as f:
+                f.write(payload)
+        self.pending.clear()
+
+
 # =============================================================================
 # Constants
 # =============================================================================
@@ -93,6 +126,24 @@ IMAGE_FORMATS: dict[str, str] = {
     "image/svg+xml": ".svg",
 }
 
+_ANSI_RE: re.Pattern[str] = re.compile(r"\x1b\[[0-9;]*m")
+
+STAR_IMPORT_RE: re.Pattern[str] = re.compile(r"^\s*from\s+\S+\s+import\s+\*", re.MULTILINE)
+
+# Mime types nbformat stores as line lists besides text/*
+SPLIT_MIMES = frozenset({"application/javascript", "image/svg+xml"})
+
+# Output format -> "module:ExporterClass", resolved lazily by cmd_convert
+EXPORTERS: dict[str, str] = {
+    "py": "nbconvert.exporters.python:PythonExporter",
+    "python": "nbconvert.exporters.python:PythonExporter",
+    "html": "nbconvert.exporters.html:HTMLExporter",
+    "md": "nbconvert.exporters.markdown:MarkdownExporter",
+    "markdown": "nbconvert.exporters.markdown:MarkdownExporter",
+    "rst": "nbconvert.exporters.rst:RSTExporter",
+    "script": "nbconvert.exporters.script:ScriptExporter",
+}
+
 
 # =============================================================================
 # Errors
@@ -139,115 +190,291 @@ class OutputPrinter(Protocol):
 # =============================================================================
 
 
+def _source_str(cell: dict[str, Any]) -> str:
+    """Cell source as one string; v4 allows either a string or a list of lines."""
+    s = cell.get("source", "")
+    return s if isinstance(s, str) else "".join(s)
+
+
+def _rejoin_lines(nb: dict[str, Any]) -> dict[str, Any]:
+    """Join list-form output strings in place, as nbformat's reader does.
+
+    Cell sources are left as stored; readers go through _source_str.
+    """
+    for cell in nb.get("cells", []):
+        for output in cell.get("outputs", []):
+            if isinstance(output.get("text"), list):
+                output["text"] = "".join(output["text"])
+            for mime, value in output.get("data", {}).items():
+                if isinstance(value, list) and not mime.endswith("json"):
+                    output["data"][mime] = "".join(value)
+    return nb
+
+
+def _loads(raw: bytes) -> Any:
+    """orjson first; stdlib json for the NaN/Infinity literals it writes and orjson rejects."""
+    try:
+        return orjson.loads(raw)
+    except orjson.JSONDecodeError:
+        return json.loads(raw)
+
+
+def read_notebook(path: str, rejoin: bool = True) -> dict[str, Any]:
+    """Load a notebook as a plain dict, skipping NotebookNode wrapping and validation.
+
+    With rejoin=False list-form strings are left as stored, for callers that
+    only mutate and write the notebook back.
+    """
+    try:
+        data = _loads(Path(path).read_bytes())
+    except (OSError, ValueError) as e:
+        raise NotebookLoadError(path, str(e)) from e
+    if not isinstance(data, dict):
+        raise NotebookLoadError(path, "top-level JSON value is not an object")
+    if data.get("nbformat") != 4:
+        # Older formats need nbformat's upgrade path
+        return load_notebook(path)
+    return _rejoin_lines(data) if rejoin else data
+
+
+def stream_notebook_sources(path: str) -> dict[str, Any]:
+    """Stream a notebook keeping metadata and cell sources only.
+
+    Output payloads are never materialized; each output is kept as an empty
+    dict so `has_output` checks still work. Peak memory is bounded by the
+    largest cell source instead of the whole file.
+    """
+    import ijson
+    from ijson.common import ObjectBuilder
+
+    meta = ObjectBuilder()
+    cells: list[dict[str, Any]] = []
+    cell: dict[str, Any] = {}
+    version = None
+    try:
+        with open(path, "rb") as f:
+            for prefix, event, value in ijson.parse(f):
+                if prefix == "metadata" or prefix.startswith("metadata."):
+                    meta.event(event, value)
+                elif not prefix.startswith("cells.item"):
+                    if prefix == "nbformat" and event == "number":
+                        version = value
+                elif prefix == "cells.item":
+                    if event == "start_map":
+                        cell = {"cell_type": "unknown", "source": "", "outputs": []}
+                    elif event == "end_map":
+                        cells.append(cell)
+                elif prefix == "cells.item.cell_type":
+                    cell["cell_type"] = value
+                elif prefix == "cells.item.source" and event == "string":
+                    cell["source"] = value
+                elif prefix == "cells.item.source.item":
+                    cell["source"] += value
+                elif prefix == "cells.item.outputs.item" and event == "start_map":
+                    cell["outputs"].append({})
+    except OSError as e:
+        raise NotebookLoadError(path, str(e)) from e
+    except ijson.JSONError:
+        # yajl rejects the NaN/Infinity literals json writes; read_notebook accepts them
+        return read_notebook(path)
+    if version != 4:
+        # Older formats need nbformat's upgrade path
+        return read_notebook(path)
+    return {"metadata": getattr(meta, "value", {}), "cells": cells}
+
+
+_nbformat: "ModuleType | None" = None
+
+
+def _nbf() -> "ModuleType":
+    """Import nbformat on first use only; read-only commands never need it."""
+    global _nbformat
+    if _nbformat is None:
+        import nbformat
+        import nbformat.reader
+
+        _nbformat = nbformat
+    return _nbformat
+
+
 def load_notebook(path: str) -> "NotebookNode":
-    """Load a notebook from path."""
-    import nbformat
+    """Load a notebook from path as a NotebookNode (for nbclient/nbconvert)."""
+    nbformat = _nbf()
 
     try:
-        return nbformat.read(path, as_version=4)
+        data = _loads(Path(path).read_bytes())
+        major, minor = nbformat.reader.get_version(data)
+        nb = nbformat.versions[major].to_notebook_json(data, minor=minor)
+        return nbformat.convert(nb, 4)
     except Exception as e:
         raise NotebookLoadError(path, str(e)) from e
 
 
-def save_notebook(nb: "NotebookNode", path: str) -> None:
-    """Save notebook to path."""
-    import nbformat
+def _split_mimebundle(data: dict[str, Any]) -> None:
+    for mime, value in data.items():
+        if isinstance(value, str) and (mime.startswith("text/") or mime in SPLIT_MIMES):
+            data[mime] = value.splitlines(True)
+
+
+def _split_lines(nb: dict[str, Any]) -> None:
+    """Split strings into line lists and drop transient keys in place, as nbformat's writer does."""
+    metadata = nb.get("metadata", {})
+    for key in ("orig_nbformat", "orig_nbformat_minor", "signature"):
+        metadata.pop(key, None)
+    for cell in nb.get("cells", []):
+        cell.get("metadata", {}).pop("trusted", None)
+        if isinstance(cell.get("source"), str):
+            cell["source"] = cell["source"].splitlines(True)
+        for attachment in cell.get("attachments", {}).values():
+            _split_mimebundle(attachment)
+        for output in cell.get("outputs", []):
+            if output.get("output_type") in ("execute_result", "display_data"):
+                _split_mimebundle(output.get("data", {}))
+            elif output.get("output_type") == "stream" and isinstance(output.get("text"), str):
+                output["text"] = output["text"].splitlines(True)
+
+
+def save_notebook(nb: dict[str, Any], path: str) -> None:
+    """Save notebook to path byte-for-byte in nbformat.write's layout.
 
-    nbformat.write(nb, path)
+    Mutates nb (line lists, transient keys); callers save as their last step.
+    """
+    _split_lines(nb)
+    text = json.dumps(nb, indent=1, sort_keys=True, separators=(",", ": "), ensure_ascii=False)
+    Path(path).write_text(text + "\n", encoding="utf-8")
 
 
-def get_notebook_meta(nb: "NotebookNode", path: str) -> NotebookMeta:
+def get_notebook_meta(nb: dict[str, Any], path: str) -> NotebookMeta:
     """Extract notebook metadata."""
+    metadata = nb.get("metadata", {})
     return NotebookMeta(
         path=path,
-        kernel=nb.metadata.get("kernelspec", {}).get("display_name", "unknown"),
-        language=nb.metadata.get("language_info", {}).get("name", "unknown"),
-        cell_count=len(nb.cells),
+        kernel=metadata.get("kernelspec", {}).get("display_name", "unknown"),
+        language=metadata.get("language_info", {}).get("name", "unknown"),
+        cell_count=len(nb["cells"]),
     )
 
 
 def get_cell_info(cell: dict, index: int) -> CellInfo:
     """Extract cell info for display."""
-    source = cell.get("source", "")
+    source = _source_str(cell)
+    # find() instead of split() so long cells don't allocate every line
+    nl = source.find("\n")
     return CellInfo(
         index=index,
         cell_type=cell.get("cell_type", "unknown"),
         lines=source.count("\n") + 1 if source else 0,
         has_output=bool(cell.get("outputs", [])),
-        first_line=source.split("\n")[0][:40] if source else "(empty)",
+        first_line=(source if nl == -1 else source[:nl])[:40] if source else "(empty)",
     )
 
 
-def is_python_notebook(nb: "NotebookNode") -> bool:
+def is_python_notebook(nb: dict[str, Any]) -> bool:
     """Check if notebook uses Python kernel."""
-    lang = nb.metadata.get("language_info", {}).get("name", "").lower()
+    metadata = nb.get("metadata", {})
+    lang = metadata.get("language_info", {}).get("name", "").lower()
     if not lang:
         # Fallback to kernelspec
-        kernel = nb.metadata.get("kernelspec", {}).get("name", "").lower()
+        kernel = metadata.get("kernelspec", {}).get("name", "").lower()
         return "python" in kernel or kernel == ""
     return lang == "python" or lang.startswith("python")
 
 
 def find_matching_cells(
-    nb: "NotebookNode",
+    nb: dict[str, Any],
     pattern: re.Pattern[str],
 ) -> tuple[CellMatch, ...]:
     """Find cells matching pattern. Pure function returning immutable results."""
     matches: list[CellMatch] = []
-    for i, cell in enumerate(nb.cells):
-        source = cell.get("source", "")
-        if pattern.search(source):
-            matching = tuple(ln for ln in source.split("\n") if pattern.search(ln))
-            matches.append(CellMatch(i, cell.cell_type, matching, source))
+    for i, cell in enumerate(nb["cells"]):
+        source = _source_str(cell)
+        # Single regex pass over the whole source; bisect offsets into line starts
+        lines: list[str] = []
+        line_starts: list[int] = []
+        line_nos: list[int] = []
+        for m in pattern.finditer(source):
+            if not lines:
+                lines = source.split("\n")
+                line_starts = list(accumulate((len(ln) + 1 for ln in lines[:-1]), initial=0))
+            n = bisect_right(line_starts, m.start()) - 1
+            if not line_nos or line_nos[-1] != n:
+                line_nos.append(n)
+        if line_nos:
+            matching = tuple(lines[n] for n in line_nos)
+            matches.append(CellMatch(i, cell.get("cell_type", "unknown"), matching, source))
     return tuple(matches)
 
 
 def save_image_output(
     data: dict[str, str],
-    image_dir: Path,
+    images: ImageSink,
     cell_idx: int,
     output_idx: int,
 ) -> Path | None:
-    """Save image data to file. Returns path if saved, None if no image."""
-    import base64
-
+    """Queue image data for writing. Returns target path if queued, None if no image."""
     for mime_type, ext in IMAGE_FORMATS.items():
         if mime_type in data:
-            image_dir.mkdir(parents=True, exist_ok=True)
-            path = image_dir / f"cell_{cell_idx}_output_{output_idx}{ext}"
+            path = images.directory / f"cell_{cell_idx}_output_{output_idx}{ext}"
             content = data[mime_type]
             if mime_type == "image/svg+xml":
-                path.write_text(content if isinstance(content, str) else "".join(content))
+                # List-form data was already joined at load time
+                payload = content.encode()
             else:
-                path.write_bytes(base64.b64decode(content))
+                payload = a2b_base64(content)
+            images.pending.append((path, payload))
             return path
     return None
 
 
 def parse_cell_indices(spec: str, total: int) -> list[int]:
-    """Parse cell specification like '0,2-4,7' into list of indices."""
-    indices: list[int] = []
+    """Parse cell specification like '0,2-4,7' into sorted, deduplicated indices."""
+    # Bit i set <=> cell i selected; ranges OR in as contiguous runs
+    mask = 0
     for part in spec.split(","):
         part = part.strip()
         if "-" in part:
             start_s, end_s = part.split("-", 1)
             start = int(start_s) if start_s else 0
-            end = int(end_s) if end_s else total - 1
-            indices.extend(range(start, end + 1))
+            end = min(int(end_s), total - 1) if end_s else total - 1
         else:
-            indices.append(int(part))
-    return sorted(set(i for i in indices if 0 <= i < total))
+            start = end = int(part)
+        # Skip out-of-range parts before shifting so huge indices never build huge ints
+        if start >= total:
+            continue
+        if start <= end:
+            mask |= ((1 << (end - start + 1)) - 1) << start
+
+    indices: list[int] = []
+    while mask:
+        lsb = mask & -mask
+        indices.append(lsb.bit_length() - 1)
+        mask ^= lsb
+    return indices
 
 
 def strip_ansi(text: str) -> str:
     """Remove ANSI escape sequences from text."""
-    return re.sub(r"\x1b\[[0-9;]*m", "", text)
+    return _ANSI_RE.sub("", text)
+
+
+@contextmanager
+def buffered_stdout() -> Iterator[None]:
+    """Collect stdout into one write when piped; stream as usual on a TTY."""
+    if sys.stdout.isatty():
+        yield
+        return
+    buf = io.StringIO()
+    try:
+        with redirect_stdout(buf):
+            yield
+    finally:
+        sys.stdout.write(buf.getvalue())
 
 
 def print_output(
     output: dict,
     raw: bool = False,
-    image_dir: Path | None = None,
+    images: ImageSink | None = None,
     cell_idx: int = 0,
     output_idx: int = 0,
 ) -> None:
@@ -260,8 +487,8 @@ def print_output(
             data = output.get("data", {})
 
             # Try to save image first
-            if image_dir:
-                saved_path = save_image_output(data, image_dir, cell_idx, output_idx)
+            if images:
+                saved_path = save_image_output(data, images, cell_idx, output_idx)
                 if saved_path:
                     print(f"[Image saved: {saved_path}]")
                     return
@@ -292,37 +519,46 @@ def print_output(
                     print(strip_ansi(line))
 
 
-def validate_notebook(nb: "NotebookNode", require_outputs: bool = False) -> ValidationResult:
+def _check_syntax(index: int, source: str) -> str | None:
+    """Syntax-check one cell via compile(), which builds no Python-level AST nodes."""
+    try:
+        # ast.parse never emitted the compiler's SyntaxWarnings (e.g. `x is 1`); keep it quiet
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", SyntaxWarning)
+            warnings.simplefilter("ignore", DeprecationWarning)
+            compile(source, f"<cell {index}>", "exec", flags=ast.PyCF_ALLOW_TOP_LEVEL_AWAIT, dont_inherit=True)
+    except SyntaxError as e:
+        return f"Cell {index}: Syntax error at line {e.lineno}: {e.msg}"
+    return None
+
+
+def validate_notebook(nb: dict[str, Any], require_outputs: bool = False) -> ValidationResult:
     """Validate notebook structure and code. Returns immutable result."""
     errors: list[str] = []
     warnings: list[str] = []
 
     is_python = is_python_notebook(nb)
     if not is_python:
-        lang = nb.metadata.get("language_info", {}).get("name", "unknown")
+        lang = nb.get("metadata", {}).get("language_info", {}).get("name", "unknown")
         warnings.append(f"Non-Python notebook ({lang}) - skipping syntax validation")
 
-    if not nb.cells:
+    if not nb["cells"]:
         warnings.append("Notebook has no cells")
 
-    for i, cell in enumerate(nb.cells):
-        if cell.cell_type != "code":
-            continue
+    code_cells = [
+        (i, cell, source)
+        for i, cell in enumerate(nb["cells"])
+        if cell.get("cell_type") == "code" and (source := _source_str(cell)).strip()
+    ]
 
-        source = cell.source
-        if not source.strip():
-            continue
+    # Syntax check (Python only)
+    if is_python:
+        errors.extend(msg for i, _, source in code_cells if (msg := _check_syntax(i, source)))
 
-        # Syntax check (Python only)
-        if is_python:
-            try:
-                ast.parse(source)
-            except SyntaxError as e:
-                errors.append(f"Cell {i}: Syntax error at line {e.lineno}: {e.msg}")
-
-            # Common Python issues
-            if "import *" in source:
-                warnings.append(f"Cell {i}: Star import detected")
+    for i, cell, source in code_cells:
+        # Common Python issues
+        if is_python and STAR_IMPORT_RE.search(source):
+            warnings.append(f"Cell {i}: Star import detected")
 
         if require_outputs and not cell.get("outputs"):
             warnings.append(f"Cell {i}: No outputs")
@@ -337,58 +573,60 @@ def validate_notebook(nb: "NotebookNode", require_outputs: bool = False) -> Vali
 
 def cmd_inspect(args: argparse.Namespace) -> int:
     """Inspect notebook structure."""
-    nb = load_notebook(args.notebook)
+    nb = stream_notebook_sources(args.notebook)
     meta = get_notebook_meta(nb, args.notebook)
 
-    print(f"Notebook: {meta.path}")
-    print(f"Kernel: {meta.kernel}")
-    print(f"Language: {meta.language}")
-    print(f"Cells: {meta.cell_count}")
-    print()
-    print("Index | Type     | Lines | Has Output | First Line")
-    print("-" * 70)
+    with buffered_stdout():
+        print(f"Notebook: {meta.path}")
+        print(f"Kernel: {meta.kernel}")
+        print(f"Language: {meta.language}")
+        print(f"Cells: {meta.cell_count}")
+        print()
+        print("Index | Type     | Lines | Has Output | First Line")
+        print("-" * 70)
 
-    for i, cell in enumerate(nb.cells):
-        info = get_cell_info(cell, i)
-        output_marker = "Yes" if info.has_output else "No"
-        print(f"{info.index:5} | {info.cell_type:8} | {info.lines:5} | {output_marker:10} | {info.first_line}")
+        for i, cell in enumerate(nb["cells"]):
+            info = get_cell_info(cell, i)
+            output_marker = "Yes" if info.has_output else "No"
+            print(f"{info.index:5} | {info.cell_type:8} | {info.lines:5} | {output_marker:10} | {info.first_line}")
 
     return 0
 
 
 def cmd_show(args: argparse.Namespace) -> int:
     """Show cell contents."""
-    nb = load_notebook(args.notebook)
-    image_dir = Path(args.save_images) if args.save_images else None
+    nb = read_notebook(args.notebook)
+    cells = nb["cells"]
+    images = ImageSink(Path(args.save_images)) if args.save_images else None
 
-    indices = parse_cell_indices(args.cells, len(nb.cells)) if args.cells else list(range(len(nb.cells)))
+    indices = parse_cell_indices(args.cells, len(cells)) if args.cells else range(len(cells))
 
-    for i in indices:
-        if i >= len(nb.cells):
-            print(f"Warning: Cell {i} does not exist", file=sys.stderr)
-            continue
+    with buffered_stdout():
+        for i in indices:
+            cell = cells[i]
+            cell_type = cell.get("cell_type", "unknown")
 
-        cell = nb.cells[i]
+            # Filter by type
+            if args.type and cell_type != args.type:
+                continue
 
-        # Filter by type
-        if args.type and cell.cell_type != args.type:
-            continue
+            print("=" * 60)
+            print(f"CELL {i} [{cell_type}]")
+            print("=" * 60)
 
-        print("=" * 60)
-        print(f"CELL {i} [{cell.cell_type}]")
-        print("=" * 60)
+            if not args.output_only:
+                print(_source_str(cell))
 
-        if not args.output_only:
-            print(cell.source)
-
-        if args.output or args.output_only:
-            outputs = cell.get("outputs", [])
-            if outputs:
-                print("\n--- OUTPUT ---")
-                for out_idx, out in enumerate(outputs):
-                    print_output(out, args.raw, image_dir, i, out_idx)
-        print()
+            if args.output or args.output_only:
+                outputs = cell.get("outputs", [])
+                if outputs:
+                    print("\n--- OUTPUT ---")
+                    for out_idx, out in enumerate(outputs):
+                        print_output(out, args.raw, images, i, out_idx)
+            print()
 
+    if images:
+        images.flush()
     return 0
 
 
@@ -398,7 +636,10 @@ def cmd_execute(args: argparse.Namespace) -> int:
     from nbclient.exceptions import CellExecutionError as NBCellExecutionError
 
     nb = load_notebook(args.notebook)
-    image_dir = Path(args.save_images) if args.save_images else None
+    cells = nb.cells
+    images = ImageSink(Path(args.save_images)) if args.save_images else None
+    # Computed once; parse_cell_indices already drops out-of-range indices
+    indices = parse_cell_indices(args.cells, len(cells)) if args.cells else range(len(cells))
 
     client = NotebookClient(
         nb,
@@ -408,14 +649,10 @@ def cmd_execute(args: argparse.Namespace) -> int:
 
     try:
         if args.cells:
-            indices = parse_cell_indices(args.cells, len(nb.cells))
             with client.setup_kernel():
                 for i in indices:
-                    if i >= len(nb.cells):
-                        print(f"Warning: Cell {i} does not exist", file=sys.stderr)
-                        continue
                     print(f"Executing cell {i}...", file=sys.stderr)
-                    client.execute_cell(nb.cells[i], i)
+                    client.execute_cell(cells[i], i)
         else:
             print("Executing all cells...", file=sys.stderr)
             client.execute()
@@ -432,22 +669,21 @@ def cmd_execute(args: argparse.Namespace) -> int:
         save_notebook(nb, args.notebook)
         print(f"Saved: {args.notebook}", file=sys.stderr)
     else:
-        indices = parse_cell_indices(args.cells, len(nb.cells)) if args.cells else list(range(len(nb.cells)))
         for i in indices:
-            if i >= len(nb.cells):
-                continue
-            cell = nb.cells[i]
+            cell = cells[i]
             if cell.cell_type == "code" and cell.get("outputs"):
                 print(f"\n--- CELL {i} OUTPUT ---")
                 for out_idx, out in enumerate(cell["outputs"]):
-                    print_output(out, image_dir=image_dir, cell_idx=i, output_idx=out_idx)
+                    print_output(out, images=images, cell_idx=i, output_idx=out_idx)
+        if images:
+            images.flush()
 
     return 0
 
 
 def cmd_validate(args: argparse.Namespace) -> int:
     """Validate notebook structure and code."""
-    nb = load_notebook(args.notebook)
+    nb = read_notebook(args.notebook)
     result = validate_notebook(nb, args.require_outputs)
 
     if result.errors:
@@ -468,26 +704,16 @@ def cmd_validate(args: argparse.Namespace) -> int:
 
 def cmd_convert(args: argparse.Namespace) -> int:
     """Convert notebook to other formats."""
-    from nbconvert import exporters
-
-    nb = load_notebook(args.notebook)
-
-    exporter_map: dict[str, type] = {
-        "py": exporters.PythonExporter,
-        "python": exporters.PythonExporter,
-        "html": exporters.HTMLExporter,
-        "md": exporters.MarkdownExporter,
-        "markdown": exporters.MarkdownExporter,
-        "rst": exporters.RSTExporter,
-        "script": exporters.ScriptExporter,
-    }
-
     fmt = args.to.lower()
-    if fmt not in exporter_map:
-        print(f"Unknown format: {fmt}. Available: {list(exporter_map.keys())}", file=sys.stderr)
+    if fmt not in EXPORTERS:
+        print(f"Unknown format: {fmt}. Available: {list(EXPORTERS.keys())}", file=sys.stderr)
         return 1
 
-    exporter = exporter_map[fmt]()
+    # Import only the exporter that was asked for
+    mod_name, cls_name = EXPORTERS[fmt].split(":")
+    exporter = getattr(importlib.import_module(mod_name), cls_name)()
+
+    nb = load_notebook(args.notebook)
     body, _ = exporter.from_notebook_node(nb)
 
     if args.output:
@@ -501,12 +727,13 @@ def cmd_convert(args: argparse.Namespace) -> int:
 
 def cmd_clear(args: argparse.Namespace) -> int:
     """Clear all outputs from notebook."""
-    nb = load_notebook(args.notebook)
+    nb = read_notebook(args.notebook, rejoin=False)
 
-    cleared = sum(1 for cell in nb.cells if cell.cell_type == "code" and cell.get("outputs"))
-
-    for cell in nb.cells:
-        if cell.cell_type == "code":
+    cleared = 0
+    for cell in nb["cells"]:
+        if cell.get("cell_type") == "code":
+            if cell.get("outputs"):
+                cleared += 1
             cell["outputs"] = []
             cell["execution_count"] = None
 
@@ -517,8 +744,9 @@ def cmd_clear(args: argparse.Namespace) -> int:
 
 def cmd_grep(args: argparse.Namespace) -> int:
     """Search cells for pattern."""
-    nb = load_notebook(args.notebook)
-    flags = re.IGNORECASE if args.ignore_case else 0
+    nb = stream_notebook_sources(args.notebook)
+    # MULTILINE keeps ^/$ anchored per line when matching whole cell sources
+    flags = re.MULTILINE | (re.IGNORECASE if args.ignore_case else 0)
     pattern = re.compile(args.pattern, flags)
 
     matches = find_matching_cells(nb, pattern)
@@ -3,6 +3,7 @@
 # requires-python = ">=3.10"
 # dependencies = [
 #     "httpx>=0.27",
+#     "orjson>=3.9",
 # ]
 # ///
 """
@@ -13,7 +14,7 @@ Usage:
   n8nctl.py get <workflow-id>
   n8nctl.py create <workflow.json>
   n8nctl.py update <workflow-id> <workflow.json>
-  n8nctl.py export <workflow-id> <out.json>
+  n8nctl.py export <workflow-id> <out.json> [--raw]
   n8nctl.py activate <workflow-id>
   n8nctl.py deactivate <workflow-id>
   n8nctl.py mcp-enable <workflow-id>
@@ -27,14 +28,16 @@ Environment:
 from __future__ import annotations
 
 import argparse
-import json
 import os
 import sys
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
-import httpx
+import orjson
+
+if TYPE_CHECKING:
+    import httpx
 
 
 @dataclass(frozen=True)
@@ -71,31 +74,57 @@ def _headers(cfg: Config) -> dict[str, str]:
     return {"X-N8N-API-KEY": cfg.api_key}
 
 
-def _request(
-    cfg: Config,
+def _client(cfg: Config) -> httpx.Client:
+    """One pooled client per run so repeated calls reuse the keep-alive connection.
+
+    httpx is imported here so offline commands like validate never load it.
+    """
+    import httpx
+
+    return httpx.Client(
+        base_url=cfg.base_url,
+        headers=_headers(cfg),
+        timeout=30.0,
+        limits=httpx.Limits(max_keepalive_connections=20, max_connections=100),
+    )
+
+
+def _request_raw(
+    client: httpx.Client,
     method: str,
     path: str,
     *,
     params: dict[str, Any] | None = None,
     body: dict[str, Any] | None = None,
-) -> dict[str, Any]:
-    url = f"{cfg.base_url}{path}"
-    headers = _headers(cfg)
+) -> bytes:
+    content = None
+    headers = None
     if body is not None:
-        headers["Content-Type"] = "application/json"
-    with httpx.Client(timeout=30.0) as client:
-        resp = client.request(method, url, params=params, json=body, headers=headers)
+        content = orjson.dumps(body)
+        headers = {"Content-Type": "application/json"}
+    resp = client.request(method, path, params=params, content=content, headers=headers)
     if resp.is_error:
         _fail(f"HTTP {resp.status_code} {resp.reason_phrase}: {resp.text}")
-    return resp.json()
+    return resp.content
+
+
+def _request(
+    client: httpx.Client,
+    method: str,
+    path: str,
+    *,
+    params: dict[str, Any] | None = None,
+    body: dict[str, Any] | None = None,
+) -> dict[str, Any]:
+    return orjson.loads(_request_raw(client, method, path, params=params, body=body))
 
 
 def _load_json(path: Path) -> dict[str, Any]:
     try:
-        data = json.loads(path.read_text(encoding="utf-8"))
+        data = orjson.loads(path.read_bytes())
     except OSError as exc:
         _fail(f"failed to read {path}: {exc}")
-    except json.JSONDecodeError as exc:
+    except orjson.JSONDecodeError as exc:
         _fail(f"invalid JSON in {path}: {exc}")
     if not isinstance(data, dict):
         _fail(f"expected JSON object in {path}")
@@ -138,7 +167,7 @@ def _validate_workflow_data(data: dict[str, Any], path: Path) -> dict[str, Any]:
     if not isinstance(settings, dict):
         errors.append("settings must be an object")
 
-    names: list[str] = []
+    name_set: set[str] = set()
     for idx, node in enumerate(nodes):
         if not isinstance(node, dict):
             errors.append(f"nodes[{idx}] must be an object")
@@ -148,13 +177,12 @@ def _validate_workflow_data(data: dict[str, Any], path: Path) -> dict[str, Any]:
         if not isinstance(name, str) or name.strip() == "":
             errors.append(f"nodes[{idx}].name must be a non-empty string")
         else:
-            if name in names:
+            if name in name_set:
                 errors.append(f"duplicate node name: {name}")
-            names.append(name)
+            name_set.add(name)
         if not isinstance(node_type, str) or node_type.strip() == "":
             errors.append(f"nodes[{idx}].type must be a non-empty string")
 
-    name_set = set(names)
     if isinstance(connections, dict):
         for src_name, src_conn in connections.items():
             if src_name not in name_set:
@@ -185,45 +213,47 @@ def _validate_workflow_data(data: dict[str, Any], path: Path) -> dict[str, Any]:
     return {"valid": len(errors) == 0, "errors": errors, "warnings": warnings, "path": str(path)}
 
 
-def cmd_list(cfg: Config, args: argparse.Namespace) -> dict[str, Any]:
+def cmd_list(client: httpx.Client, args: argparse.Namespace) -> dict[str, Any]:
     params: dict[str, Any] = {}
     if args.limit is not None:
         params["limit"] = args.limit
     if args.active is not None:
         params["active"] = args.active
-    return _request(cfg, "GET", "/api/v1/workflows", params=params)
+    return _request(client, "GET", "/api/v1/workflows", params=params)
 
 
-def cmd_get(cfg: Config, args: argparse.Namespace) -> dict[str, Any]:
-    return _request(cfg, "GET", f"/api/v1/workflows/{args.workflow_id}")
+def cmd_get(client: httpx.Client, args: argparse.Namespace) -> dict[str, Any]:
+    return _request(client, "GET", f"/api/v1/workflows/{args.workflow_id}")
 
 
-def cmd_create(cfg: Config, args: argparse.Namespace) -> dict[str, Any]:
+def cmd_create(client: httpx.Client, args: argparse.Namespace) -> dict[str, Any]:
     payload = _workflow_payload(_require_workflow_fields(_load_json(args.path), args.path))
-    return _request(cfg, "POST", "/api/v1/workflows", body=payload)
+    return _request(client, "POST", "/api/v1/workflows", body=payload)
 
 
-def cmd_update(cfg: Config, args: argparse.Namespace) -> dict[str, Any]:
+def cmd_update(client: httpx.Client, args: argparse.Namespace) -> dict[str, Any]:
     payload = _workflow_payload(_require_workflow_fields(_load_json(args.path), args.path))
-    return _request(cfg, "PUT", f"/api/v1/workflows/{args.workflow_id}", body=payload)
+    return _request(client, "PUT", f"/api/v1/workflows/{args.workflow_id}", body=payload)
 
 
-def cmd_export(cfg: Config, args: argparse.Namespace) -> dict[str, Any]:
-    data = _request(cfg, "GET", f"/api/v1/workflows/{args.workflow_id}")
-    args.out.write_text(json.dumps(data, indent=2), encoding="utf-8")
+def cmd_export(client: httpx.Client, args: argparse.Namespace) -> dict[str, Any]:
+    raw = _request_raw(client, "GET", f"/api/v1/workflows/{args.workflow_id}")
+    if not args.raw:
+        raw = orjson.dumps(orjson.loads(raw), option=orjson.OPT_INDENT_2)
+    args.out.write_bytes(raw)
     return {"saved": str(args.out)}
 
 
-def cmd_activate(cfg: Config, args: argparse.Namespace) -> dict[str, Any]:
-    return _request(cfg, "POST", f"/api/v1/workflows/{args.workflow_id}/activate")
+def cmd_activate(client: httpx.Client, args: argparse.Namespace) -> dict[str, Any]:
+    return _request(client, "POST", f"/api/v1/workflows/{args.workflow_id}/activate")
 
 
-def cmd_deactivate(cfg: Config, args: argparse.Namespace) -> dict[str, Any]:
-    return _request(cfg, "POST", f"/api/v1/workflows/{args.workflow_id}/deactivate")
+def cmd_deactivate(client: httpx.Client, args: argparse.Namespace) -> dict[str, Any]:
+    return _request(client, "POST", f"/api/v1/workflows/{args.workflow_id}/deactivate")
 
 
-def cmd_mcp_enable(cfg: Config, args: argparse.Namespace) -> dict[str, Any]:
-    wf = _request(cfg, "GET", f"/api/v1/workflows/{args.workflow_id}")
+def cmd_mcp_enable(client: httpx.Client, args: argparse.Namespace) -> dict[str, Any]:
+    wf = _request(client, "GET", f"/api/v1/workflows/{args.workflow_id}")
     settings = dict(wf.get("settings") or {})
     settings["availableInMCP"] = True
     payload = _workflow_payload(
@@ -234,10 +264,10 @@ def cmd_mcp_enable(cfg: Config, args: argparse.Namespace) -> dict[str, Any]:
             "settings": settings,
         }
     )
-    return _request(cfg, "PUT", f"/api/v1/workflows/{args.workflow_id}", body=payload)
+    return _request(client, "PUT", f"/api/v1/workflows/{args.workflow_id}", body=payload)
 
 
-def cmd_validate(_: Config | None, args: argparse.Namespace) -> dict[str, Any]:
+def cmd_validate(_: httpx.Client | None, args: argparse.Namespace) -> dict[str, Any]:
     data = _load_json(args.path)
     return _validate_workflow_data(data, args.path)
 
@@ -266,6 +296,7 @@ def build_parser() -> argparse.ArgumentParser:
     export_p = sub.add_parser("export", help="export workflow JSON")
     export_p.add_argument("workflow_id")
     export_p.add_argument("out", type=Path)
+    export_p.add_argument("--raw", action="store_true", help="write response bytes as-is (no re-indent)")
 
     activate_p = sub.add_parser("activate", help="activate workflow")
     activate_p.add_argument("workflow_id")
@@ -299,11 +330,12 @@ def main() -> None:
     }
 
     handler = handlers[args.command]
-    cfg: Config | None = None
-    if args.command != "validate":
-        cfg = load_config(args)
-    result = handler(cfg, args)
-    print(json.dumps(result, indent=2))
+    if args.command == "validate":
+        result = handler(None, args)
+    else:
+        with _client(load_config(args)) as client:
+            result = handler(client, args)
+    sys.stdout.buffer.write(orjson.dumps(result, option=orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE))
 
 
 if __name__ == "__main__":
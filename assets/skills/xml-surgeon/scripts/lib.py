@@ -5,11 +5,33 @@ import difflib
 import glob
 import re
 import sys
+from bisect import bisect_right
+from collections import Counter
+from dataclasses import dataclass, field
+from functools import cached_property, lru_cache, partial
+from itertools import chain
 from io import BytesIO
-from typing import Iterable, List, Tuple
+from typing import Any, Callable, Iterable, Iterator, List, Tuple
 
 from lxml import etree
-from xml.sax.saxutils import escape as xml_escape
+
+_XML_DECL_RE = re.compile(br"\s*<\?xml\s+[^>]*\?>")
+_ENC_RE = re.compile(br"encoding=[\"']([^\"']+)[\"']")
+_END_SELFCLOSE_RE = re.compile(r"/\s*>\s*$")
+_FRAGMENT_PARSER = etree.XMLParser(resolve_entities=False)
+
+_ID_CALL_RE = re.compile(r"(?<![\w.-])id\s*\(")
+_SIMPLE_DESCENDANT_RE = re.compile(r"//(?:([A-Za-z_][\w.-]*):)?([A-Za-z_][\w.-]*)")
+_HUNK_RE = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+_DIFF_CONTEXT = 3
+# Unchanged lines kept on each side of the trimmed slice, beyond the context
+_DIFF_MARGIN = 4 * _DIFF_CONTEXT
+_MARKUP_RE = re.compile(
+    r"<!--.*?-->|<!\[CDATA\[.*?\]\]>|<\?.*?\?>|<!DOCTYPE(?:[^\[>]|\[.*?\])*>"
+    # [^\W\d] is any Unicode letter or '_', so non-ASCII NameStartChars match too
+    r"|<((?:[^\W\d]|:)[^\s/>]*)(?:[^>\"']|\"[^\"]*\"|'[^']*')*>",
+    re.S,
+)
 
 
 def fail(msg: str, code: int = 2) -> None:
@@ -18,40 +40,62 @@ def fail(msg: str, code: int = 2) -> None:
 
 
 def read_bytes(path: str) -> bytes:
-    with open(path, "rb") as f:
+    with open(path, "rb", buffering=0) as f:
         return f.read()
 
 
 def detect_decl_and_encoding(data: bytes) -> Tuple[bool, str | None]:
-    m = re.match(br"\s*<\?xml\s+[^>]*\?>", data)
+    m = _XML_DECL_RE.match(data)
     has_decl = bool(m)
     enc = None
     if has_decl:
-        m2 = re.search(br"encoding=[\"']([^\"']+)[\"']", data[:200])
+        m2 = _ENC_RE.search(data, 0, 200)
         if m2:
             enc = m2.group(1).decode("ascii", "ignore")
     return has_decl, enc
 
 
-def parser(huge: bool, recover: bool) -> etree.XMLParser:
+@lru_cache(maxsize=8)
+def parser(huge: bool, recover: bool, collect_ids: bool = False) -> etree.XMLParser:
     return etree.XMLParser(
         remove_blank_text=False,
         huge_tree=huge,
         recover=recover,
         resolve_entities=False,
+        collect_ids=collect_ids,
     )
 
 
-def parse_doc(path: str, huge: bool, recover: bool) -> Tuple[etree._ElementTree, bytes, bool, str | None]:
+def needs_ids(xpath: str) -> bool:
+    """XPath id() only sees IDs the parser collected into its hash table."""
+    return _ID_CALL_RE.search(xpath) is not None
+
+
+def parse_doc(
+    path: str, huge: bool, recover: bool, collect_ids: bool = False
+) -> Tuple[etree._ElementTree, bytes, bool, str | None]:
     data = read_bytes(path)
     has_decl, enc = detect_decl_and_encoding(data)
     try:
-        tree = etree.parse(BytesIO(data), parser(huge=huge, recover=recover))
+        tree = etree.parse(BytesIO(data), parser(huge, recover, collect_ids))
     except etree.XMLSyntaxError as exc:
         fail(f"XML parse failed for {path}: {exc}")
     return tree, data, has_decl, enc
 
 
+def simple_descendant_tag(xpath: str, ns_map: dict | None = None) -> str | None:
+    """Tag (Clark notation when prefixed) if xpath is a bare `//name` or `//p:name` step."""
+    m = _SIMPLE_DESCENDANT_RE.fullmatch(xpath.strip())
+    if not m:
+        return None
+    prefix, name = m.groups()
+    if prefix is None:
+        return name
+    uri = (ns_map or {}).get(prefix)
+    # unknown prefix: leave it to XPath so the error message stays the same
+    return f"{{{uri}}}{name}" if uri else None
+
+
 def serialize(tree: etree._ElementTree, has_decl: bool, enc: str | None) -> bytes:
     docinfo = tree.docinfo
     encoding = enc or docinfo.encoding or "utf-8"
@@ -67,22 +111,26 @@ def serialize(tree: etree._ElementTree, has_decl: bool, enc: str | None) -> byte
     return buf.getvalue()
 
 
-def expand_paths(raw_paths: Iterable[str]) -> List[str]:
-    paths: List[str] = []
+def expand_paths(raw_paths: Iterable[str]) -> Iterator[str]:
+    seen: set[str] = set()
     for raw in raw_paths:
         if any(ch in raw for ch in "*?[]"):
-            matches = glob.glob(raw, recursive=True)
-            paths.extend(sorted(matches))
+            matches: Iterable[str] = sorted(glob.iglob(raw, recursive=True))
         else:
-            paths.append(raw)
-    seen = set()
-    out = []
-    for p in paths:
-        if p in seen:
-            continue
-        seen.add(p)
-        out.append(p)
-    return out
+            matches = (raw,)
+        for path in matches:
+            if path not in seen:
+                seen.add(path)
+                yield path
+
+
+def require_paths(raw_paths: Iterable[str]) -> Iterator[str]:
+    """Expand lazily, failing up front only when nothing matches at all."""
+    paths = expand_paths(raw_paths)
+    first = next(paths, None)
+    if first is None:
+        fail("no files matched")
+    return chain((first,), paths)
 
 
 def parse_ns(ns_items: List[str]) -> dict:
@@ -97,10 +145,46 @@ def parse_ns(ns_items: List[str]) -> dict:
     return ns_map
 
 
-def select(tree: etree._ElementTree, xpath: str, ns_map: dict) -> List:
+@lru_cache(maxsize=64)
+def _compiled_xpath(xpath: str, ns_items: tuple[tuple[str, str], ...]) -> etree.XPath:
+    return etree.XPath(xpath, namespaces=dict(ns_items))
+
+
+def _iter_tag(tag: str, tree: etree._ElementTree) -> List[etree._Element]:
+    return list(tree.iter(tag))
+
+
+def parse_vars(var_items: List[str]) -> dict:
+    variables = {}
+    for item in var_items:
+        if "=" not in item:
+            fail(f"variable must be name=value: {item}")
+        name, value = item.split("=", 1)
+        if not name:
+            fail(f"variable must be name=value: {item}")
+        variables[name] = value
+    return variables
+
+
+def compile_xpath(xpath: str, ns_map: dict, variables: dict | None = None) -> Callable[..., Any]:
+    """Compile once per expression; $name variables bind per call, outside the cache key."""
+    tag = simple_descendant_tag(xpath, ns_map)
+    if tag is not None:
+        # `//tag` is a C-level tag-filtered walk; no need for the XPath engine
+        return partial(_iter_tag, tag)
     try:
-        return tree.xpath(xpath, namespaces=ns_map)
-    except etree.XPathEvalError as exc:
+        compiled = _compiled_xpath(xpath, tuple(sorted(ns_map.items())))
+    except etree.XPathSyntaxError as exc:
+        fail(f"XPath error: {exc}")
+    if variables:
+        return partial(compiled, **variables)
+    return compiled
+
+
+def select(tree: etree._ElementTree, xpath: Callable[..., Any]) -> List:
+    try:
+        return xpath(tree)
+    except etree.XPathError as exc:
         fail(f"XPath error: {exc}")
 
 
@@ -128,6 +212,18 @@ def read_text_arg(value: str | None, value_file: str | None) -> str:
     return value or ""
 
 
+def read_xml_fragments(sources: List[str]) -> List[List[etree._Element]]:
+    """Parse several fragments in one pass; returns each fragment's top-level nodes."""
+    wrapped = "".join(f"<_part>{src}</_part>" for src in sources)
+    try:
+        root = etree.fromstring(f"<_wrap>{wrapped}</_wrap>".encode("utf-8"), _FRAGMENT_PARSER)
+    except etree.XMLSyntaxError as exc:
+        fail(f"XML fragment parse failed: {exc}")
+    if len(root) != len(sources):
+        fail("XML fragment parse failed: unbalanced fragment")
+    return [list(part) for part in root]
+
+
 def read_xml_fragment(xml: str | None, xml_file: str | None) -> List[etree._Element]:
     if xml is None and xml_file is None:
         fail("provide --xml or --xml-file")
@@ -137,26 +233,18 @@ def read_xml_fragment(xml: str | None, xml_file: str | None) -> List[etree._Elem
         with open(xml_file, "r", encoding="utf-8") as f:
             xml = f.read()
     assert xml is not None
-    wrapper = f"<_wrap>{xml}</_wrap>"
-    try:
-        root = etree.fromstring(wrapper.encode("utf-8"))
-    except etree.XMLSyntaxError as exc:
-        fail(f"XML fragment parse failed: {exc}")
-    return list(root)
+    return read_xml_fragments([xml])[0]
 
 
 def ws_only(text: str | None) -> bool:
-    return text is not None and text.strip() == ""
+    return text is not None and (text == "" or text.isspace())
 
 
 def infer_indent_from(text: str | None) -> str | None:
-    if text is None or text == "":
-        return None
-    if not ws_only(text):
-        return None
-    if "\n" not in text:
-        return None
-    return text
+    # "\n" check first: cheap, and rejects most non-indent tails early
+    if text and "\n" in text and text.isspace():
+        return text
+    return None
 
 
 def sibling_indent(target: etree._Element) -> str:
@@ -178,6 +266,14 @@ def child_indent(parent: etree._Element) -> str:
     return "\n"
 
 
+def clone_nodes(nodes: List[etree._Element]) -> List[etree._Element]:
+    """Copy fragment nodes via one deepcopy of their shared wrapper when possible."""
+    parent = nodes[0].getparent() if nodes else None
+    if parent is not None and len(parent) == len(nodes):
+        return list(copy.deepcopy(parent))
+    return [copy.deepcopy(n) for n in nodes]
+
+
 def set_tails(nodes: List[etree._Element], tail: str | None) -> None:
     if tail is None:
         return
@@ -200,7 +296,7 @@ def apply_insert(
             idx = parent.index(el)
             if position == "after":
                 idx += 1
-            clones = [copy.deepcopy(n) for n in nodes]
+            clones = clone_nodes(nodes)
             tail = indent_override or sibling_indent(el)
             set_tails(clones, tail)
             for n in clones:
@@ -208,7 +304,7 @@ def apply_insert(
                 idx += 1
             changed += len(clones)
         elif position in {"inside-first", "inside-last"}:
-            clones = [copy.deepcopy(n) for n in nodes]
+            clones = clone_nodes(nodes)
             tail = indent_override or child_indent(el)
             set_tails(clones, tail)
             if position == "inside-first":
@@ -236,7 +332,7 @@ def apply_replace(
         if parent is None:
             fail("cannot replace root element")
         idx = parent.index(el)
-        clones = [copy.deepcopy(n) for n in nodes]
+        clones = clone_nodes(nodes)
         tail = indent_override or sibling_indent(el)
         set_tails(clones, tail)
         for n in clones:
@@ -293,6 +389,49 @@ def summarize(path: str, matches: int, changed: int, wrote: bool) -> None:
         print(f"{path}: {matches} match(es), {changed} change(s) ({action})")
 
 
+def common_affix_lens(a: List[str], b: List[str]) -> Tuple[int, int]:
+    limit = min(len(a), len(b))
+    head = 0
+    while head < limit and a[head] == b[head]:
+        head += 1
+    tail = 0
+    while tail < limit - head and a[-1 - tail] == b[-1 - tail]:
+        tail += 1
+    return head, tail
+
+
+def _unified_diff(path: str, a: List[str], b: List[str]) -> List[str]:
+    return list(
+        difflib.unified_diff(
+            a,
+            b,
+            fromfile=f"{path}:before",
+            tofile=f"{path}:after",
+            lineterm="",
+            n=_DIFF_CONTEXT,
+        )
+    )
+
+
+def _hunk_spans(diff: List[str]) -> Iterator[Tuple[int, int, int, int]]:
+    """Yield (a_start, a_len, b_start, b_len) per hunk header, 1-based like the header."""
+    for line in diff:
+        m = _HUNK_RE.match(line)
+        if m:
+            a_start, a_len, b_start, b_len = m.groups()
+            yield int(a_start), int(a_len or 1), int(b_start), int(b_len or 1)
+
+
+def _shift_hunk(line: str, offset: int) -> str:
+    m = _HUNK_RE.match(line)
+    if not m:
+        return line
+    a_start, a_len, b_start, b_len = m.groups()
+    a_part = f"{int(a_start) + offset}" + (f",{a_len}" if a_len is not None else "")
+    b_part = f"{int(b_start) + offset}" + (f",{b_len}" if b_len is not None else "")
+    return f"@@ -{a_part} +{b_part} @@{line[m.end():]}"
+
+
 def show_diff(path: str, original: bytes, updated: bytes) -> None:
     try:
         orig_text = original.decode("utf-8")
@@ -300,14 +439,24 @@ def show_diff(path: str, original: bytes, updated: bytes) -> None:
     except UnicodeDecodeError:
         print(f"{path}: binary diff (non-utf8)")
         return
-    diff = difflib.unified_diff(
-        orig_text.splitlines(),
-        new_text.splitlines(),
-        fromfile=f"{path}:before",
-        tofile=f"{path}:after",
-        lineterm="",
-    )
-    print("\n".join(diff))
+    a = orig_text.splitlines()
+    b = new_text.splitlines()
+    # Surgical edits touch few lines; only the differing middle (plus a margin) goes to difflib.
+    head, tail = common_affix_lens(a, b)
+    offset = max(head - _DIFF_MARGIN, 0)
+    keep = max(tail - _DIFF_MARGIN, 0)
+    a_mid = a[offset : len(a) - keep]
+    b_mid = b[offset : len(b) - keep]
+    diff = _unified_diff(path, a_mid, b_mid)
+    # A hunk reaching a cut edge may have lost context or aligned differently
+    # than it would against the whole file; redo the diff untrimmed then.
+    for a_start, a_len, b_start, b_len in _hunk_spans(diff):
+        if (offset and min(a_start, b_start) <= 1) or (
+            keep and (a_start + a_len >= len(a_mid) or b_start + b_len >= len(b_mid))
+        ):
+            diff, offset = _unified_diff(path, a, b), 0
+            break
+    print("\n".join(_shift_hunk(line, offset) for line in diff))
 
 
 def element_outer_xml(el: etree._Element, pretty: bool) -> str:
@@ -319,28 +468,29 @@ def element_outer_xml(el: etree._Element, pretty: bool) -> str:
     )
 
 
-def element_inner_xml(el: etree._Element, pretty: bool) -> str:
+def element_inner_xml(el: etree._Element, pretty: bool, max_chars: int | None = None) -> str:
+    """Serialize children one at a time, stopping once past max_chars (truncate cuts the rest)."""
     parts: List[str] = []
+    size = 0
     if el.text:
         parts.append(el.text)
+        size = len(el.text)
     for child in el:
-        parts.append(
-            etree.tostring(
-                child,
-                encoding="unicode",
-                pretty_print=pretty,
-                with_tail=True,
-            )
+        if max_chars is not None and size > max_chars:
+            break
+        part = etree.tostring(
+            child,
+            encoding="unicode",
+            pretty_print=pretty,
+            with_tail=True,
         )
+        parts.append(part)
+        size += len(part)
     return "".join(parts)
 
 
 def child_tag_counts(el: etree._Element) -> List[Tuple[str, int]]:
-    counts: dict[str, int] = {}
-    for child in el:
-        tag = str(child.tag)
-        counts[tag] = counts.get(tag, 0) + 1
-    return sorted(counts.items())
+    return sorted(Counter(str(child.tag) for child in el.iterchildren()).items())
 
 
 def truncate(text: str, max_chars: int | None) -> str:
@@ -349,25 +499,29 @@ def truncate(text: str, max_chars: int | None) -> str:
     return f"{text[:max_chars]}..."
 
 
-def decode_lines(data: bytes, enc: str | None) -> List[str]:
+def source_lines(data: bytes, enc: str | None) -> List[bytes] | List[str]:
+    """Split raw bytes into lines so only the lines actually shown get decoded.
+
+    Encodings where b"\\n" is not a newline (UTF-16/32) are decoded up front.
+    """
     encoding = enc or "utf-8"
-    try:
-        text = data.decode(encoding)
-    except UnicodeDecodeError:
-        text = data.decode(encoding, errors="replace")
-    return text.splitlines()
+    if "\n".encode(encoding) == b"\n":
+        return data.splitlines()
+    return decode_text(data, enc).splitlines()
+
+
+def decode_line(line: bytes | str, enc: str | None) -> str:
+    if isinstance(line, str):
+        return line
+    return decode_text(line, enc)
 
 
 def format_attrs(el: etree._Element, attr_names: List[str]) -> str:
     if not attr_names:
         return ""
-    parts = []
-    for name in attr_names:
-        if name in el.attrib:
-            parts.append(f"{name}={el.attrib[name]!r}")
-    if not parts:
-        return ""
-    return " " + " ".join(parts)
+    attrib = el.attrib
+    joined = " ".join(f"{name}={attrib[name]!r}" for name in attr_names if name in attrib)
+    return f" {joined}" if joined else ""
 
 
 def outline_lines(
@@ -380,37 +534,30 @@ def outline_lines(
 ) -> List[str]:
     lines: List[str] = []
     count = 0
-
-    def emit(node: etree._Element, depth: int) -> bool:
-        nonlocal count
+    # Explicit stack of (node, depth) entries; a str entry is a pending "... more" line
+    roots = [el] if include_root else list(el)
+    stack: List[tuple[etree._Element, int] | str] = [(node, 0) for node in reversed(roots)]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            lines.append(item)
+            continue
+        node, depth = item
         if max_nodes is not None and count >= max_nodes:
-            return False
+            break
         indent = "  " * depth
         attr_str = format_attrs(node, attr_names)
         lines.append(f"{indent}<{node.tag}>{attr_str}")
         count += 1
         if depth >= max_depth:
-            return True
-        children = list(node)
-        if max_children is not None and len(children) > max_children:
-            visible = children[:max_children]
-            extra = len(children) - max_children
+            continue
+        n_children = len(node)
+        if max_children is not None and n_children > max_children:
+            stack.append(f"{indent}  ... (+{n_children - max_children} more)")
+            children = node[:max_children]
         else:
-            visible = children
-            extra = 0
-        for child in visible:
-            if not emit(child, depth + 1):
-                return False
-        if extra:
-            lines.append(f"{indent}  ... (+{extra} more)")
-        return True
-
-    if include_root:
-        emit(el, 0)
-    else:
-        for child in list(el):
-            if not emit(child, 0):
-                break
+            children = list(node)
+        stack.extend((child, depth + 1) for child in reversed(children))
 
     return lines
 
@@ -430,52 +577,114 @@ def encode_text(text: str, enc: str | None) -> bytes:
 
 def line_starts(text: str) -> List[int]:
     starts = [0]
-    for idx, ch in enumerate(text):
-        if ch == "\n":
-            starts.append(idx + 1)
+    find = text.find
+    pos = find("\n")
+    while pos != -1:
+        starts.append(pos + 1)
+        pos = find("\n", pos + 1)
     return starts
 
 
+@dataclass
+class DocumentView:
+    """Decoded document text plus offsets shared by every surgical op on it."""
+
+    text: str
+    _ordinals: dict[etree._Element, int] = field(default_factory=dict, init=False, repr=False)
+
+    @cached_property
+    def starts(self) -> List[int]:
+        return line_starts(self.text)
+
+    @cached_property
+    def start_tags(self) -> dict[int, List[tuple[int, int, str]]]:
+        return scan_start_tags(self.text, self.starts)
+
+    def start_tag_span(self, el: etree._Element) -> tuple[int, int, str] | None:
+        """(start, end, qname) of el's start tag; end is the index of its '>'."""
+        line = el.sourceline or 0
+        tag = local_tag(str(el.tag))
+        spans = [s for s in self.start_tags.get(line, ()) if s[2].rpartition(":")[2] == tag]
+        if len(spans) > 1:
+            # Several same-named tags end on this line; pick by document order
+            nth = self._same_line_ordinals(el).get(el, len(spans))
+            return spans[nth] if nth < len(spans) else None
+        return spans[0] if spans else None
+
+    def _same_line_ordinals(self, el: etree._Element) -> dict[etree._Element, int]:
+        if not self._ordinals:
+            seen: dict[tuple[int | None, str], int] = {}
+            for node in el.getroottree().getroot().iter(etree.Element):
+                key = (node.sourceline, local_tag(str(node.tag)))
+                self._ordinals[node] = seen.get(key, 0)
+                seen[key] = self._ordinals[node] + 1
+        return self._ordinals
+
+
 def local_tag(tag: str) -> str:
     return tag.split("}", 1)[-1] if "}" in tag else tag
 
 
-def find_start_tag_span(text: str, line_start: int, tag: str) -> tuple[int, int] | None:
-    needle = f"<{tag}"
-    start = text.find(needle, line_start)
-    if start == -1:
-        start = text.find("<", line_start)
-    if start == -1:
-        return None
-    in_quote = None
-    i = start
-    while i < len(text):
-        ch = text[i]
-        if ch in "\"'":
-            if in_quote is None:
-                in_quote = ch
-            elif in_quote == ch:
-                in_quote = None
-        elif ch == ">" and in_quote is None:
-            return start, i
-        i += 1
-    return None
+def scan_start_tags(text: str, starts: List[int]) -> dict[int, List[tuple[int, int, str]]]:
+    """Index start tags as (start, end, qname) by the 1-based line of their closing '>'.
+
+    That is the line lxml reports as sourceline. Comments, CDATA, PIs and the
+    doctype are consumed whole so tags inside them are not indexed.
+    """
+    index: dict[int, List[tuple[int, int, str]]] = {}
+    for m in _MARKUP_RE.finditer(text):
+        qname = m.group(1)
+        if qname is None:
+            continue
+        end = m.end() - 1
+        index.setdefault(bisect_right(starts, end), []).append((m.start(), end, qname))
+    return index
+
+
+def apply_edits(text: str, edits: List[tuple[int, int, str]]) -> str:
+    """Splice non-overlapping half-open (start, stop, replacement) edits in one pass."""
+    if not edits:
+        return text
+    parts: List[str] = []
+    cursor = 0
+    for start, stop, repl in sorted(edits, key=lambda x: x[0]):
+        parts.append(text[cursor:start])
+        parts.append(repl)
+        cursor = stop
+    parts.append(text[cursor:])
+    return "".join(parts)
+
+
+def escape_text(value: str) -> str:
+    return value.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
 
 
 def escape_attr(value: str, quote: str) -> str:
     if quote == "\"":
-        return xml_escape(value, {"\"": "&quot;"})
-    return xml_escape(value, {"'": "&apos;"})
+        return escape_text(value).replace("\"", "&quot;")
+    return escape_text(value).replace("'", "&apos;")
+
+
+@lru_cache(maxsize=256)
+def _set_attr_re(name: str) -> re.Pattern[str]:
+    return re.compile(rf'(\s+{re.escape(name)}\s*=\s*)(["\'])(.*?)\2')
 
 
-def set_attr_in_tag(tag_text: str, name: str, value: str) -> tuple[str, bool]:
-    pattern = re.compile(rf'(\s+{re.escape(name)}\s*=\s*)(["\'])(.*?)\2')
+@lru_cache(maxsize=256)
+def _del_attr_re(name: str) -> re.Pattern[str]:
+    return re.compile(rf'\s+{re.escape(name)}\s*=\s*(["\'])(.*?)\1')
+
+
+def set_attr_in_tag(
+    tag_text: str, name: str, value: str, pattern: re.Pattern[str] | None = None
+) -> tuple[str, bool]:
+    pattern = pattern or _set_attr_re(name)
     match = pattern.search(tag_text)
     if match:
         quote = match.group(2)
         escaped = escape_attr(value, quote)
         replacement = f"{match.group(1)}{quote}{escaped}{quote}"
-        return pattern.sub(replacement, tag_text, count=1), True
+        return tag_text[: match.start()] + replacement + tag_text[match.end() :], True
     insert = f" {name}=\"{escape_attr(value, chr(34))}\""
     if tag_text.rstrip().endswith("/>"):
         idx = tag_text.rfind("/>")
@@ -486,88 +695,74 @@ def set_attr_in_tag(tag_text: str, name: str, value: str) -> tuple[str, bool]:
     return tag_text, False
 
 
-def del_attr_in_tag(tag_text: str, name: str) -> tuple[str, bool]:
-    pattern = re.compile(rf'\s+{re.escape(name)}\s*=\s*(["\'])(.*?)\1')
+def del_attr_in_tag(
+    tag_text: str, name: str, pattern: re.Pattern[str] | None = None
+) -> tuple[str, bool]:
+    pattern = pattern or _del_attr_re(name)
     match = pattern.search(tag_text)
     if not match:
         return tag_text, False
-    return pattern.sub("", tag_text, count=1), True
+    return tag_text[: match.start()] + tag_text[match.end() :], True
 
 
 def apply_attr_surgical(
-    text: str,
+    doc: DocumentView,
     elements: List[etree._Element],
     name: str,
     value: str | None,
     set_value: bool,
 ) -> tuple[str, int]:
-    starts = line_starts(text)
+    text = doc.text
     edits: List[tuple[int, int, str]] = []
     seen = set()
+    pattern = _set_attr_re(name) if set_value else _del_attr_re(name)
 
     for el in elements:
-        line = el.sourceline or 0
-        if line <= 0 or line > len(starts):
-            continue
-        tag = local_tag(str(el.tag))
-        span = find_start_tag_span(text, starts[line - 1], tag)
+        span = doc.start_tag_span(el)
         if not span:
             continue
-        start, end = span
+        start, end, _ = span
         if start in seen:
             continue
         seen.add(start)
         tag_text = text[start : end + 1]
         if set_value:
-            new_tag, changed = set_attr_in_tag(tag_text, name, value or "")
+            new_tag, changed = set_attr_in_tag(tag_text, name, value or "", pattern)
         else:
-            new_tag, changed = del_attr_in_tag(tag_text, name)
+            new_tag, changed = del_attr_in_tag(tag_text, name, pattern)
         if changed and new_tag != tag_text:
-            edits.append((start, end, new_tag))
+            edits.append((start, end + 1, new_tag))
 
-    for start, end, new_tag in sorted(edits, key=lambda x: x[0], reverse=True):
-        text = text[:start] + new_tag + text[end + 1 :]
-
-    return text, len(edits)
+    return apply_edits(text, edits), len(edits)
 
 
 def apply_text_surgical(
-    text: str, elements: List[etree._Element], value: str
+    doc: DocumentView, elements: List[etree._Element], value: str
 ) -> tuple[str, int]:
-    starts = line_starts(text)
+    text = doc.text
     edits: List[tuple[int, int, str]] = []
     seen = set()
 
     for el in elements:
         if len(el):
             fail("set-text only supports elements without child elements in surgical mode")
-        line = el.sourceline or 0
-        if line <= 0 or line > len(starts):
-            continue
-        tag = local_tag(str(el.tag))
-        span = find_start_tag_span(text, starts[line - 1], tag)
+        span = doc.start_tag_span(el)
         if not span:
             continue
-        start, end = span
+        start, end, tag = span
         if start in seen:
             continue
         seen.add(start)
         tag_text = text[start : end + 1]
-        if re.search(r"/\s*>\s*$", tag_text):
-            replacement = re.sub(
-                r"/\s*>\s*$",
-                f">{xml_escape(value)}</{tag}>",
-                tag_text,
-            )
-            edits.append((start, end, replacement))
+        m = _END_SELFCLOSE_RE.search(tag_text)
+        if m:
+            replacement = f"{tag_text[: m.start()]}>{escape_text(value)}</{tag}>"
+            edits.append((start, end + 1, replacement))
             continue
         end_tag = f"</{tag}>"
         end_tag_idx = text.find(end_tag, end + 1)
         if end_tag_idx == -1:
             continue
-        edits.append((end + 1, end_tag_idx, xml_escape(value)))
-
-    for start, end, new_text in sorted(edits, key=lambda x: x[0], reverse=True):
-        text = text[:start] + new_text + text[end:]
+        edits.append((end + 1, end_tag_idx, escape_text(value)))
 
-    return text, len(edits)
+    return apply_edits(text, edits), len(edits)
@@ -10,29 +10,34 @@ import argparse
 from typing import Callable, List
 
 from lib import (
+    DocumentView,
     apply_attr_surgical,
     apply_delete,
     apply_insert,
     apply_replace,
     apply_text_surgical,
     child_tag_counts,
-    decode_lines,
+    compile_xpath,
+    decode_line,
     decode_text,
     element_inner_xml,
     element_outer_xml,
     encode_text,
     ensure_elements,
-    expand_paths,
     fail,
     limit,
+    needs_ids,
     outline_lines,
     parse_doc,
     parse_ns,
+    parse_vars,
     read_text_arg,
     read_xml_fragment,
+    require_paths,
     select,
     serialize,
     show_diff,
+    source_lines,
     summarize,
     truncate,
 )
@@ -43,6 +48,7 @@ def common_parser() -> argparse.ArgumentParser:
     p.add_argument("paths", nargs="+", help="XML file paths or glob patterns")
     p.add_argument("--xpath", required=True, help="XPath to select elements")
     p.add_argument("--ns", action="append", default=[], help="Namespace prefix=uri")
+    p.add_argument("--var", action="append", default=[], help="XPath variable name=value ($name)")
     p.add_argument("--limit", type=int, help="Limit matches per file")
     p.add_argument("--huge", action="store_true", help="Allow huge trees")
     p.add_argument("--recover", action="store_true", help="Recover from XML errors")
@@ -54,16 +60,17 @@ def mutate_files(
     mutator: Callable[[List], int],
 ) -> int:
     ns_map = parse_ns(args.ns)
-    paths = expand_paths(args.paths)
-    if not paths:
-        fail("no files matched")
+    paths = require_paths(args.paths)
+    xpath = compile_xpath(args.xpath, ns_map, parse_vars(args.var))
     for path in paths:
-        tree, original, has_decl, enc = parse_doc(path, args.huge, args.recover)
-        items = select(tree, args.xpath, ns_map)
+        tree, original, has_decl, enc = parse_doc(
+            path, args.huge, args.recover, needs_ids(args.xpath)
+        )
+        items = select(tree, xpath)
         items = limit(items, args.limit)
         elements = ensure_elements(items)
         changed = mutator(elements)
-        updated = serialize(tree, has_decl, enc)
+        updated = serialize(tree, has_decl, enc) if changed else original
         wrote = False
         if changed and args.in_place:
             with open(path, "wb") as f:
@@ -77,12 +84,11 @@ def mutate_files(
 
 def cmd_select(args: argparse.Namespace) -> int:
     ns_map = parse_ns(args.ns)
-    paths = expand_paths(args.paths)
-    if not paths:
-        fail("no files matched")
+    paths = require_paths(args.paths)
+    xpath = compile_xpath(args.xpath, ns_map, parse_vars(args.var))
     for path in paths:
-        tree, _, _, _ = parse_doc(path, args.huge, args.recover)
-        items = select(tree, args.xpath, ns_map)
+        tree, _, _, _ = parse_doc(path, args.huge, args.recover, needs_ids(args.xpath))
+        items = select(tree, xpath)
         items = limit(items, args.limit)
         print(f"{path}: {len(items)} match(es)")
         for idx, item in enumerate(items, 1):
@@ -97,12 +103,11 @@ def cmd_select(args: argparse.Namespace) -> int:
 
 def cmd_get(args: argparse.Namespace) -> int:
     ns_map = parse_ns(args.ns)
-    paths = expand_paths(args.paths)
-    if not paths:
-        fail("no files matched")
+    paths = require_paths(args.paths)
+    xpath = compile_xpath(args.xpath, ns_map, parse_vars(args.var))
     for path in paths:
-        tree, _, _, _ = parse_doc(path, args.huge, args.recover)
-        items = select(tree, args.xpath, ns_map)
+        tree, _, _, _ = parse_doc(path, args.huge, args.recover, needs_ids(args.xpath))
+        items = select(tree, xpath)
         items = limit(items, args.limit)
         print(f"{path}:")
         for idx, item in enumerate(items, 1):
@@ -118,38 +123,36 @@ def cmd_get(args: argparse.Namespace) -> int:
 
 def cmd_show(args: argparse.Namespace) -> int:
     ns_map = parse_ns(args.ns)
-    paths = expand_paths(args.paths)
-    if not paths:
-        fail("no files matched")
+    paths = require_paths(args.paths)
+    xpath = compile_xpath(args.xpath, ns_map, parse_vars(args.var))
     for path in paths:
-        tree, _, _, _ = parse_doc(path, args.huge, args.recover)
-        items = select(tree, args.xpath, ns_map)
+        tree, _, _, _ = parse_doc(path, args.huge, args.recover, needs_ids(args.xpath))
+        items = select(tree, xpath)
         items = limit(items, args.limit)
         elements = ensure_elements(items)
         print(f"{path}: {len(elements)} match(es)")
         for idx, el in enumerate(elements, 1):
+            rows = []
             if not args.no_header:
-                line = el.sourceline or 0
-                print(f"  [{idx}] <{el.tag}> line {line}")
+                rows.append(f"  [{idx}] <{el.tag}> line {el.sourceline or 0}")
             if args.inner:
-                out = element_inner_xml(el, args.pretty)
+                out = element_inner_xml(el, args.pretty, args.max_chars)
             else:
                 out = element_outer_xml(el, args.pretty)
-            out = truncate(out, args.max_chars)
-            print(out)
+            rows.append(truncate(out, args.max_chars))
             if idx < len(elements):
-                print("---")
+                rows.append("---")
+            print("\n".join(rows))
     return 0
 
 
 def cmd_children(args: argparse.Namespace) -> int:
     ns_map = parse_ns(args.ns)
-    paths = expand_paths(args.paths)
-    if not paths:
-        fail("no files matched")
+    paths = require_paths(args.paths)
+    xpath = compile_xpath(args.xpath, ns_map, parse_vars(args.var))
     for path in paths:
-        tree, _, _, _ = parse_doc(path, args.huge, args.recover)
-        items = select(tree, args.xpath, ns_map)
+        tree, _, _, _ = parse_doc(path, args.huge, args.recover, needs_ids(args.xpath))
+        items = select(tree, xpath)
         items = limit(items, args.limit)
         elements = ensure_elements(items)
         print(f"{path}: {len(elements)} match(es)")
@@ -157,57 +160,57 @@ def cmd_children(args: argparse.Namespace) -> int:
             line = el.sourceline or 0
             print(f"  [{idx}] <{el.tag}> line {line}")
             if args.list:
-                for child in el:
-                    c_line = child.sourceline or 0
+                rows = []
+                for child in el.iterchildren():
+                    attrib = child.attrib
                     attrs = ""
-                    if args.attrs and child.attrib:
-                        attrs = " " + " ".join(
-                            f"{k}={v!r}" for k, v in sorted(child.attrib.items())
-                        )
-                    print(f"    - <{child.tag}> line {c_line}{attrs}")
+                    if args.attrs and attrib:
+                        attrs = " " + " ".join(f"{k}={v!r}" for k, v in sorted(attrib.items()))
+                    rows.append(f"    - <{child.tag}> line {child.sourceline or 0}{attrs}")
             else:
-                for tag, count in child_tag_counts(el):
-                    print(f"    {tag}: {count}")
+                rows = [f"    {tag}: {count}" for tag, count in child_tag_counts(el)]
+            if rows:
+                print("\n".join(rows))
     return 0
 
 
 def cmd_outline(args: argparse.Namespace) -> int:
     ns_map = parse_ns(args.ns)
-    paths = expand_paths(args.paths)
-    if not paths:
-        fail("no files matched")
+    paths = require_paths(args.paths)
+    xpath = compile_xpath(args.xpath, ns_map, parse_vars(args.var))
     for path in paths:
-        tree, _, _, _ = parse_doc(path, args.huge, args.recover)
-        items = select(tree, args.xpath, ns_map)
+        tree, _, _, _ = parse_doc(path, args.huge, args.recover, needs_ids(args.xpath))
+        items = select(tree, xpath)
         items = limit(items, args.limit)
         elements = ensure_elements(items)
         print(f"{path}: {len(elements)} match(es)")
         for idx, el in enumerate(elements, 1):
-            line = el.sourceline or 0
-            print(f"  [{idx}] <{el.tag}> line {line}")
-            for out in outline_lines(
-                el,
-                args.depth,
-                args.attr,
-                args.max_children,
-                args.max_nodes,
-                include_root=False,
-            ):
-                print(f"    {out}")
+            rows = [f"  [{idx}] <{el.tag}> line {el.sourceline or 0}"]
+            rows.extend(
+                f"    {out}"
+                for out in outline_lines(
+                    el,
+                    args.depth,
+                    args.attr,
+                    args.max_children,
+                    args.max_nodes,
+                    include_root=False,
+                )
+            )
+            print("\n".join(rows))
     return 0
 
 
 def cmd_context(args: argparse.Namespace) -> int:
     ns_map = parse_ns(args.ns)
-    paths = expand_paths(args.paths)
-    if not paths:
-        fail("no files matched")
+    paths = require_paths(args.paths)
+    xpath = compile_xpath(args.xpath, ns_map, parse_vars(args.var))
     for path in paths:
-        tree, original, _, enc = parse_doc(path, args.huge, args.recover)
-        items = select(tree, args.xpath, ns_map)
+        tree, original, _, enc = parse_doc(path, args.huge, args.recover, needs_ids(args.xpath))
+        items = select(tree, xpath)
         items = limit(items, args.limit)
         elements = ensure_elements(items)
-        lines = decode_lines(original, enc)
+        lines = source_lines(original, enc)
         print(f"{path}: {len(elements)} match(es)")
         for idx, el in enumerate(elements, 1):
             line = el.sourceline or 0
@@ -216,29 +219,31 @@ def cmd_context(args: argparse.Namespace) -> int:
                 continue
             start = max(1, line - args.before)
             end = min(len(lines), line + args.after)
+            rows = []
             if not args.no_header:
-                print(f"  [{idx}] <{el.tag}> lines {start}-{end}")
+                rows.append(f"  [{idx}] <{el.tag}> lines {start}-{end}")
             for ln in range(start, end + 1):
                 prefix = ">>" if ln == line else "  "
-                print(f"{prefix} {ln:6d} | {lines[ln - 1]}")
+                rows.append(f"{prefix} {ln:6d} | {decode_line(lines[ln - 1], enc)}")
             if idx < len(elements):
-                print("---")
+                rows.append("---")
+            if rows:
+                print("\n".join(rows))
     return 0
 
 
 def cmd_set_text(args: argparse.Namespace) -> int:
     value = read_text_arg(args.value, args.value_file)
     ns_map = parse_ns(args.ns)
-    paths = expand_paths(args.paths)
-    if not paths:
-        fail("no files matched")
+    paths = require_paths(args.paths)
+    xpath = compile_xpath(args.xpath, ns_map, parse_vars(args.var))
     for path in paths:
-        tree, original, _, enc = parse_doc(path, args.huge, args.recover)
-        items = select(tree, args.xpath, ns_map)
+        tree, original, _, enc = parse_doc(path, args.huge, args.recover, needs_ids(args.xpath))
+        items = select(tree, xpath)
         items = limit(items, args.limit)
         elements = ensure_elements(items)
-        text = decode_text(original, enc)
-        updated_text, changed = apply_text_surgical(text, elements, value)
+        doc = DocumentView(decode_text(original, enc))
+        updated_text, changed = apply_text_surgical(doc, elements, value)
         updated = encode_text(updated_text, enc)
         wrote = False
         if changed and args.in_place:
@@ -254,17 +259,16 @@ def cmd_set_text(args: argparse.Namespace) -> int:
 def cmd_set_attr(args: argparse.Namespace) -> int:
     value = read_text_arg(args.value, args.value_file)
     ns_map = parse_ns(args.ns)
-    paths = expand_paths(args.paths)
-    if not paths:
-        fail("no files matched")
+    paths = require_paths(args.paths)
+    xpath = compile_xpath(args.xpath, ns_map, parse_vars(args.var))
     for path in paths:
-        tree, original, _, enc = parse_doc(path, args.huge, args.recover)
-        items = select(tree, args.xpath, ns_map)
+        tree, original, _, enc = parse_doc(path, args.huge, args.recover, needs_ids(args.xpath))
+        items = select(tree, xpath)
         items = limit(items, args.limit)
         elements = ensure_elements(items)
-        text = decode_text(original, enc)
+        doc = DocumentView(decode_text(original, enc))
         updated_text, changed = apply_attr_surgical(
-            text, elements, args.name, value, True
+            doc, elements, args.name, value, True
         )
         updated = encode_text(updated_text, enc)
         wrote = False
@@ -280,17 +284,16 @@ def cmd_set_attr(args: argparse.Namespace) -> int:
 
 def cmd_del_attr(args: argparse.Namespace) -> int:
     ns_map = parse_ns(args.ns)
-    paths = expand_paths(args.paths)
-    if not paths:
-        fail("no files matched")
+    paths = require_paths(args.paths)
+    xpath = compile_xpath(args.xpath, ns_map, parse_vars(args.var))
     for path in paths:
-        tree, original, _, enc = parse_doc(path, args.huge, args.recover)
-        items = select(tree, args.xpath, ns_map)
+        tree, original, _, enc = parse_doc(path, args.huge, args.recover, needs_ids(args.xpath))
+        items = select(tree, xpath)
         items = limit(items, args.limit)
         elements = ensure_elements(items)
-        text = decode_text(original, enc)
+        doc = DocumentView(decode_text(original, enc))
         updated_text, changed = apply_attr_surgical(
-            text, elements, args.name, None, False
+            doc, elements, args.name, None, False
         )
         updated = encode_text(updated_text, enc)
         wrote = False
@@ -329,10 +332,7 @@ def cmd_replace(args: argparse.Namespace) -> int:
 def cmd_delete(args: argparse.Namespace) -> int:
     if not args.reformat_ok:
         fail("delete reserializes XML and may reformat; pass --reformat-ok to proceed")
-    def mutator(elements: List) -> int:
-        return apply_delete(elements)
-
-    return mutate_files(args, mutator)
+    return mutate_files(args, apply_delete)
 
 
 def build_parser() -> argparse.ArgumentParser:
@@ -0,0 +1,26 @@
+import sys
+from pathlib import Path
+
+from lxml import etree
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+from lib import DocumentView, line_starts, scan_start_tags  # noqa: E402
+
+DOC = '<r>\n  <été a="1">x</été>\n  <数据>y</数据>\n  <_u/><a:b xmlns:a="urn:a"/>\n</r>\n'
+
+
+def test_scan_start_tags_indexes_non_ascii_names():
+    index = scan_start_tags(DOC, line_starts(DOC))
+    assert [qname for _, _, qname in index[2]] == ["été"]
+    assert [qname for _, _, qname in index[3]] == ["数据"]
+    assert [qname for _, _, qname in index[4]] == ["_u", "a:b"]
+
+
+def test_start_tag_span_finds_non_ascii_element():
+    tree = etree.fromstring(DOC.encode("utf-8"))
+    doc = DocumentView(DOC)
+    for el in tree.iter(etree.Element):
+        start, end, qname = doc.start_tag_span(el)
+        assert DOC[start] == "<" and DOC[end] == ">"
+        assert etree.QName(el).localname == qname.rpartition(":")[2]
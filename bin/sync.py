@@ -1,9 +1,11 @@
 #!/usr/bin/env -S uv run python
 from __future__ import annotations
 
-import functools
+import errno
 import itertools
+import os
 import shutil
+import stat
 import sys
 from dataclasses import dataclass, field
 from pathlib import Path
@@ -18,6 +20,12 @@ MCPORTER_HOME = Path.home() / ".mcporter"
 
 DEFAULT_AGENT_FILE = "AGENTS.md"
 
+# linux/fs.h: _IOW(0x94, 9, int); shares extents copy-on-write on btrfs/xfs/bcachefs
+FICLONE = 0x40049409
+# filesystem-wide "no reflinks here" answers (EXDEV: source and target trees sit on
+# different filesystems); once seen, stop paying the extra opens per file
+REFLINK_UNSUPPORTED = frozenset({errno.EOPNOTSUPP, errno.ENOTTY, errno.EINVAL, errno.EXDEV})
+
 
 @dataclass(frozen=True)
 class ToolConfig:
@@ -49,18 +57,6 @@ class Job:
     kind: JobKind
 
 
-def guard(func: Callable[..., bool]) -> Callable[..., bool]:
-    @functools.wraps(func)
-    def wrapper(*args, **kwargs) -> bool:
-        try:
-            return func(*args, **kwargs)
-        except Exception as exc:  # defensive: keep sync from crashing on unexpected errors
-            err(f"unexpected error in {func.__name__}: {exc}")
-            return False
-
-    return wrapper
-
-
 def err(message: str) -> None:
     print(f"sync: {message}", file=sys.stderr)
 
@@ -69,14 +65,19 @@ def ensure_dir(path: Path) -> None:
     path.mkdir(parents=True, exist_ok=True)
 
 
+def lstat_or_none(path: Path) -> os.stat_result | None:
+    try:
+        return os.lstat(path)
+    except FileNotFoundError:
+        return None
+
+
 def rm_entry(path: Path) -> None:
-    if path.is_symlink():
-        try:
-            path.unlink()
-        except FileNotFoundError:
-            return
+    st = lstat_or_none(path)
+    if st is None:
         return
-    if path.is_dir():
+    # lstat: a symlink to a directory is unlinked, never followed into
+    if stat.S_ISDIR(st.st_mode):
         shutil.rmtree(path)
         return
     try:
@@ -85,65 +86,117 @@ def rm_entry(path: Path) -> None:
         return
 
 
-def tool_dirs() -> list[Job]:
-    jobs: list[Job] = []
+reflink_supported = sys.platform == "linux"
+
+
+def same_file(src: str | Path, dst: str | Path) -> bool:
+    try:
+        return os.path.samefile(src, dst)
+    except OSError:
+        return False
+
+
+def clone_file(src: str | Path, dst: str | Path) -> str | Path:
+    """copy2, but reflinked where the filesystem supports it so no data is rewritten.
+
+    Hardlinks are not used: tools may edit their copies in place, which would
+    write through to the shared assets.
+    """
+    global reflink_supported
+    # open(dst, "wb") follows symlinks and truncates: never reach it when dst
+    # resolves to src; copy2 then refuses with SameFileError without touching it
+    if reflink_supported and not same_file(src, dst):
+        import fcntl
+
+        try:
+            with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+                fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+        except OSError as exc:
+            if exc.errno in REFLINK_UNSUPPORTED:
+                reflink_supported = False
+        else:
+            shutil.copystat(src, dst)
+            return dst
+    # copyfile inside copy2 already uses sendfile(2) on Linux / fcopyfile on macOS
+    return shutil.copy2(src, dst)
+
+
+def up_to_date(src: str | Path, dst: str | Path) -> bool:
+    """Same size and mtime as the source, which copy2/copystat leave behind on a previous sync."""
+    try:
+        src_st = os.stat(src)
+        dst_st = os.lstat(dst)
+    except OSError:
+        return False
+    return (
+        stat.S_ISREG(src_st.st_mode)
+        and stat.S_ISREG(dst_st.st_mode)
+        and src_st.st_size == dst_st.st_size
+        and src_st.st_mtime_ns == dst_st.st_mtime_ns
+    )
+
+
+def sync_file(src: str | Path, dst: str | Path) -> str | Path:
+    if up_to_date(src, dst):
+        return dst
+    return clone_file(src, dst)
+
+
+def tool_dirs() -> Iterator[Job]:
     for tool_name, tool in TOOL_CONFIG.items():
         src = TOOLS_HOME / tool_name
         if tool.tool_subdir is not None:
             src = src / tool.tool_subdir
-        jobs.append(Job(src, tool.home, "dir"))
-    return jobs
+        yield Job(src, tool.home, "dir")
 
 
-def asset_copies() -> list[Job]:
+def asset_copies() -> Iterator[Job]:
     if not ASSETS_HOME.is_dir():
-        return []
-    jobs: list[Job] = []
+        return
     for asset_path in (path for path in ASSETS_HOME.iterdir() if path.is_dir()):
         asset_name = asset_path.name
         for tool in TOOL_CONFIG.values():
             dest_name = tool.asset_renames.get(asset_name, asset_name)
-            jobs.append(Job(asset_path, tool.home / dest_name, "dir"))
-    return jobs
+            yield Job(asset_path, tool.home / dest_name, "dir")
 
 
-def agent_files() -> list[Job]:
-    return [
-        Job(AGENTS_HOME / DEFAULT_AGENT_FILE, tool.home / tool.agent_file, "file")
-        for tool in TOOL_CONFIG.values()
-    ]
+def agent_files() -> Iterator[Job]:
+    for tool in TOOL_CONFIG.values():
+        yield Job(AGENTS_HOME / DEFAULT_AGENT_FILE, tool.home / tool.agent_file, "file")
 
 
-def config_files() -> list[Job]:
-    return [Job(ASSETS_HOME / "mcporter.jsonc", MCPORTER_HOME / "mcporter.json", "file")]
+def config_files() -> Iterator[Job]:
+    yield Job(ASSETS_HOME / "mcporter.jsonc", MCPORTER_HOME / "mcporter.json", "file")
 
 
-@guard
 def copy_item(src: Path, dst: Path) -> bool:
-    if not src.exists() and not src.is_symlink():
+    src_st = lstat_or_none(src)
+    if src_st is None:
         err(f"missing source: {src}")
         return True
+    src_is_dir = stat.S_ISDIR(src_st.st_mode) or (stat.S_ISLNK(src_st.st_mode) and src.is_dir())
+    if not src_is_dir and up_to_date(src, dst):
+        return True
     ensure_dir(dst.parent)
     rm_entry(dst)
     try:
-        if src.is_dir():
-            shutil.copytree(src, dst, symlinks=False)
+        if src_is_dir:
+            shutil.copytree(src, dst, symlinks=False, copy_function=clone_file)
         else:
-            shutil.copy2(src, dst)
+            clone_file(src, dst)
     except OSError as exc:
         err(f"copy failed: {src} -> {dst} ({exc})")
         return False
     return True
 
 
-@guard
 def copy_dir_into(src_dir: Path, dst_dir: Path) -> bool:
     if not src_dir.is_dir():
         err(f"missing directory: {src_dir}")
         return True
     ensure_dir(dst_dir)
     try:
-        shutil.copytree(src_dir, dst_dir, symlinks=False, dirs_exist_ok=True, copy_function=shutil.copy2)
+        shutil.copytree(src_dir, dst_dir, symlinks=False, dirs_exist_ok=True, copy_function=sync_file)
     except OSError as exc:
         err(f"copy failed: {src_dir} -> {dst_dir} ({exc})")
         return False
@@ -161,7 +214,15 @@ def iter_jobs(builders: Iterable[Callable[[], Iterable[Job]]]) -> Iterator[Job]:
 
 
 def run_jobs(jobs: Iterable[Job]) -> bool:
-    return all(HANDLERS[job.kind](job.src, job.dst) for job in jobs)
+    for job in jobs:
+        handler = HANDLERS[job.kind]
+        try:
+            if not handler(job.src, job.dst):
+                return False
+        except Exception as exc:  # defensive: keep sync from crashing on unexpected errors
+            err(f"unexpected error in {handler.__name__}: {exc}")
+            return False
+    return True
 
 
 def main() -> int: